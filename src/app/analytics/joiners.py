@@ -1,20 +1,52 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
-from app.db.mongo import get_collection
-from app.data.age_gate_curated import get_status as age_gate_status
+from app.db.mongo import DOMAIN_RANK_INDEX, get_collection
+from app.data.age_gate_curated import CURATED
+
+
+@lru_cache(maxsize=None)
+def _coll(name: str):
+    # Collection handles are cheap but not free; cache them per name so the
+    # hot request paths skip the client/db attribute resolution.
+    return get_collection(name)
+
+_UNKNOWN_STATUS: Dict[str, Optional[str]] = {"status": "unknown", "note": None}
+
+# Process-level TTL cache for the latest domain_rank date per country.
+# The value changes at most daily, so a short TTL saves a Mongo round trip
+# on every /top-domains and /age-gate request.
+_LATEST_TTL_SECONDS = 60.0
+_LATEST_CACHE: Dict[str, tuple[float, Optional[str]]] = {}
+_LATEST_LOCK = threading.Lock()
 
 
 def _latest_date_for_country(country: str) -> Optional[str]:
     """
     Return the most recent 'date' present in domain_rank for the given country.
     Dates are stored as YYYY-MM-DD strings; lexicographic sort is fine.
+    Results are memoized per country for a short TTL.
     """
-    coll = get_collection("domain_rank")
-    doc = coll.find({"country": country.upper()}, {"_id": 0, "date": 1}).sort("date", -1).limit(1)
+    key = country.upper()
+    now = time.monotonic()
+    with _LATEST_LOCK:
+        hit = _LATEST_CACHE.get(key)
+        if hit is not None and now - hit[0] < _LATEST_TTL_SECONDS:
+            return hit[1]
+
+    coll = _coll("domain_rank")
+    doc = coll.find({"country": key}, {"_id": 0, "date": 1}).sort("date", -1).limit(1)
     rows = list(doc)
-    return rows[0]["date"] if rows else None
+    latest = rows[0]["date"] if rows else None
+
+    with _LATEST_LOCK:
+        _LATEST_CACHE[key] = (now, latest)
+    return latest
 
 
 def top_domains_for_day(
@@ -28,7 +60,7 @@ def top_domains_for_day(
     Returns (resolved_date, rows[{country,date,domain,rank,category}]).
     """
     country = country.upper()
-    coll = get_collection("domain_rank")
+    coll = _coll("domain_rank")
 
     day = date or _latest_date_for_country(country)
     if not day:
@@ -38,7 +70,7 @@ def top_domains_for_day(
     if category:
         q["category"] = category
 
-    cur = coll.find(q, {"_id": 0}).sort("rank", 1).limit(int(limit))
+    cur = coll.find(q, {"_id": 0}).hint(DOMAIN_RANK_INDEX).sort("rank", 1).limit(int(limit))
     return day, list(cur)
 
 
@@ -59,17 +91,29 @@ def top_domains_with_age_gate(
       }
     """
     day, rows = top_domains_for_day(country=country, date=date, limit=limit, category=category)
-    counts = {"yes": 0, "unknown": 0, "no": 0}
-    out: List[Dict] = []
-
-    for r in rows:
-        domain = r.get("domain", "")
-        ag = age_gate_status(domain)
-        status = (ag.get("status") or "unknown").lower()
-        if status not in counts:
-            status = "unknown"
-        counts[status] += 1
-        out.append({**r, "age_gate": {"status": status, "note": ag.get("note")}})
+
+    # Single pass: resolve curated status per row (one dict.get each), then tally.
+    keys = [r.get("domain", "").lower() for r in rows]
+    statuses = [
+        CURATED.get(k) or (CURATED.get(k[4:]) if k.startswith("www.") else None) or _UNKNOWN_STATUS
+        for k in keys
+    ]
+    tally = Counter(
+        s["status"] if s.get("status") in ("yes", "no", "unknown") else "unknown"
+        for s in statuses
+    )
+    counts = {"yes": tally["yes"], "unknown": tally["unknown"], "no": tally["no"]}
+
+    out: List[Dict] = [
+        {
+            **r,
+            "age_gate": {
+                "status": s["status"] if s.get("status") in ("yes", "no", "unknown") else "unknown",
+                "note": s.get("note"),
+            },
+        }
+        for r, s in zip(rows, statuses)
+    ]
 
     return {
         "country": country.upper(),
@@ -1,42 +1,112 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
+import pandas as pd
 
 from app.db.mongo import get_collection
 
+# Shared pool for overlapping Mongo round trips; pymongo releases the GIL
+# during network I/O, so the pre/post window fetches run concurrently.
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="window-stats")
 
-def _find_series(country: str, metric: str, since_iso: str, until_iso: str) -> List[Dict]:
+
+def _find_series_multi(
+    countries: List[str], metric: str, since_iso: str, until_iso: str
+) -> Dict[str, List[Dict]]:
+    """
+    Fetch the same metric/window for several countries in one query via $in,
+    bucketed back into {country: [{ts, value}, ...]} on the Python side.
+    Unsorted on purpose: the window stats are order-insensitive and
+    _align_by_ts re-indexes by timestamp anyway.
+    """
     coll = get_collection("traffic_ts")
+    ccs = [c.upper() for c in countries]
     q = {
-        "country": country.upper(),
+        "country": {"$in": ccs},
         "metric": metric,
         "ts": {"$gte": since_iso, "$lte": until_iso},
     }
-    cur = coll.find(q, {"_id": 0, "ts": 1, "value": 1}).sort("ts", 1)
-    return list(cur)
+    out: Dict[str, List[Dict]] = {c: [] for c in ccs}
+    cur = coll.find(q, {"_id": 0, "country": 1, "ts": 1, "value": 1})
+    for doc in cur:
+        out[doc["country"]].append({"ts": doc["ts"], "value": doc["value"]})
+    return out
 
 
-def _align_by_ts(series_list: List[List[Dict]]) -> Dict[str, List[Optional[float]]]:
-    all_ts = sorted({pt["ts"] for s in series_list for pt in s})
-    aligned: Dict[str, List[Optional[float]]] = {ts: [None] * len(series_list) for ts in all_ts}
-    for idx, s in enumerate(series_list):
-        kv = {pt["ts"]: pt["value"] for pt in s}
-        for ts in all_ts:
-            if ts in kv:
-                aligned[ts][idx] = float(kv[ts])
-    return aligned
+def _align_by_ts(series_list: List[List[Dict]]) -> np.ndarray:
+    """
+    Pivot the series into a (n_timestamps, n_series) float matrix with NaN for
+    missing points, so downstream stats run as NumPy array ops instead of
+    Python dict-of-lists loops.
+    """
+    records = [
+        (pt["ts"], idx, float(pt["value"]))
+        for idx, s in enumerate(series_list)
+        for pt in s
+    ]
+    if not records:
+        return np.empty((0, len(series_list)), dtype=float)
+    df = pd.DataFrame(records, columns=["ts", "i", "v"])
+    # aggfunc="last" mirrors the old dict behavior: later points win on dupes
+    mat = df.pivot_table(index="ts", columns="i", values="v", aggfunc="last")
+    mat = mat.reindex(columns=range(len(series_list)))
+    return mat.to_numpy(dtype=float)
+
+
+def _fetch_window_maps(
+    countries: List[str],
+    metric: str,
+    pre_since: str,
+    post_since: str,
+    post_until: str,
+) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+    """
+    One aggregation round trip for both windows and every country: match the
+    whole [pre_since, post_until] range, bucket each point pre/post by
+    comparing ts to the event boundary, and group the values per
+    (country, bucket).
+    """
+    coll = get_collection("traffic_ts")
+    pipeline = [
+        {
+            "$match": {
+                "country": {"$in": countries},
+                "metric": metric,
+                "ts": {"$gte": pre_since, "$lte": post_until},
+            }
+        },
+        {
+            "$addFields": {
+                "bucket": {"$cond": [{"$lt": ["$ts", post_since]}, "pre", "post"]}
+            }
+        },
+        {
+            "$group": {
+                "_id": {"c": "$country", "b": "$bucket"},
+                "vals": {"$push": {"ts": "$ts", "v": "$value"}},
+            }
+        },
+    ]
+    pre_map: Dict[str, List[Dict]] = {c: [] for c in countries}
+    post_map: Dict[str, List[Dict]] = {c: [] for c in countries}
+    for doc in coll.aggregate(pipeline):
+        rows = [{"ts": r["ts"], "value": r["v"]} for r in doc.get("vals") or []]
+        target = pre_map if doc["_id"]["b"] == "pre" else post_map
+        target[doc["_id"]["c"]] = rows
+    return pre_map, post_map
 
 
 def _mean(vals: List[float]) -> Optional[float]:
+    # Plain sum/len: for the short per-window lists here, NumPy's array
+    # construction costs more than the mean itself. The aligned-matrix stats
+    # in _period_stats stay vectorized where it actually pays off.
     if not vals:
         return None
-    arr = np.array(vals, dtype=float)
-    if arr.size == 0:
-        return None
-    return float(np.mean(arr))
+    return float(sum(vals) / len(vals))
 
 
 def compute_window_stats(
@@ -60,8 +130,20 @@ def compute_window_stats(
     post_since = event_dt.isoformat()
     post_until = (event_dt + timedelta(days=post_days)).isoformat()
 
-    s_pre = _find_series(country, metric, pre_since, pre_until)
-    s_post = _find_series(country, metric, post_since, post_until)
+    # Single aggregation covers both windows for the base country and every
+    # control; fall back to the parallel find() path if the server rejects it.
+    all_countries = [country.upper()] + [c.upper() for c in controls]
+    try:
+        pre_map, post_map = _fetch_window_maps(
+            all_countries, metric, pre_since, post_since, post_until
+        )
+    except Exception:
+        pre_fut = _EXECUTOR.submit(_find_series_multi, all_countries, metric, pre_since, pre_until)
+        post_fut = _EXECUTOR.submit(_find_series_multi, all_countries, metric, post_since, post_until)
+        pre_map = pre_fut.result()
+        post_map = post_fut.result()
+    s_pre = pre_map[all_countries[0]]
+    s_post = post_map[all_countries[0]]
 
     mean_pre = _mean([p["value"] for p in s_pre])
     mean_post = _mean([p["value"] for p in s_post])
@@ -74,20 +156,25 @@ def compute_window_stats(
     controls_detail: Dict[str, Dict[str, int]] = {}
 
     if controls:
-        pre_series_list = [s_pre] + [_find_series(c, metric, pre_since, pre_until) for c in controls]
-        post_series_list = [s_post] + [_find_series(c, metric, post_since, post_until) for c in controls]
+        pre_series_list = [pre_map[c] for c in all_countries]
+        post_series_list = [post_map[c] for c in all_countries]
 
         def _period_stats(series_list: List[List[Dict]]) -> Optional[Tuple[float, float]]:
-            aligned = _align_by_ts(series_list)
-            diffs = []
-            for ts, vect in aligned.items():
-                base = vect[0]
-                ctrls = [v for v in vect[1:] if v is not None]
-                if base is None or not ctrls:
-                    continue
-                ctrl_mean = float(np.mean(ctrls))
-                diffs.append(base - ctrl_mean)
-            if not diffs:
+            mat = _align_by_ts(series_list)
+            if mat.size == 0 or mat.shape[1] < 2:
+                return None
+            base = mat[:, 0]
+            ctrls = mat[:, 1:]
+            n_ctrl = np.sum(~np.isnan(ctrls), axis=1)
+            with np.errstate(invalid="ignore"):
+                ctrl_mean = np.where(
+                    n_ctrl > 0,
+                    np.nansum(ctrls, axis=1) / np.maximum(n_ctrl, 1),
+                    np.nan,
+                )
+            diffs = base - ctrl_mean
+            diffs = diffs[~np.isnan(diffs)]
+            if diffs.size == 0:
                 return None
             return float(np.mean(diffs)), float(np.std(diffs) or 0.0)
 
@@ -101,9 +188,10 @@ def compute_window_stats(
                 z_score = float((post_mean_diff - pre_mean_diff) / pre_std)
 
         for c in controls:
+            cc = c.upper()
             controls_detail[c] = {
-                "pre_points": len(_find_series(c, metric, pre_since, pre_until)),
-                "post_points": len(_find_series(c, metric, post_since, post_until)),
+                "pre_points": len(pre_map[cc]),
+                "post_points": len(post_map[cc]),
             }
 
     return {
@@ -1,13 +1,24 @@
 from __future__ import annotations
+from functools import lru_cache
 from typing import Dict, List, Optional
 from flask import Blueprint, jsonify, request
 
 from app.analytics.joiners import _latest_date_for_country
-from app.db.mongo import get_collection
-from app.data.age_gate_curated import CURATED, get_status
+from app.db.mongo import DOMAIN_RANK_INDEX, get_collection
+from app.data.age_gate_curated import SORTED_DOMAINS, YES_SET, get_status
 
 bp = Blueprint("api_age_gate", __name__)
 
+# List form for use inside aggregation expressions ($in wants an array).
+# Include 'www.'-prefixed variants so the server-side match keeps parity with
+# get_status(), which strips that prefix before the curated lookup.
+YES_LIST = sorted(YES_SET | {f"www.{d}" for d in YES_SET})
+
+
+@lru_cache(maxsize=None)
+def _coll(name: str):
+	return get_collection(name)
+
 
 def _resolved_date(country: str, date: Optional[str]) -> Optional[str]:
 	return date or _latest_date_for_country(country)
@@ -27,8 +38,9 @@ def age_gate_status():
 	top_map: Dict[str, int] = {}
 	if day:
 		cur = (
-			get_collection("domain_rank")
+			_coll("domain_rank")
 			.find({"country": country, "date": day}, {"_id": 0, "domain": 1, "rank": 1})
+			.hint(DOMAIN_RANK_INDEX)
 			.sort("rank", 1)
 			.limit(limit)
 		)
@@ -36,14 +48,20 @@ def age_gate_status():
 			top_map[doc["domain"].lower()] = int(doc["rank"])
 
 	results: List[Dict] = []
-	for domain in sorted(CURATED.keys()):
+	counts = {"yes": 0, "unknown": 0, "no": 0, "in_top": 0}
+	for domain in SORTED_DOMAINS:
 		status = get_status(domain)
 		dlow = domain.lower()
 		in_top = dlow in top_map
+		status_key = status.get("status", "unknown")
+		if status_key in counts:
+			counts[status_key] += 1
+		if in_top:
+			counts["in_top"] += 1
 		results.append(
 			{
 				"domain": domain,
-				"status": status.get("status", "unknown"),
+				"status": status_key,
 				"note": status.get("note"),
 				"in_top": in_top,
 				"rank": top_map.get(dlow),
@@ -57,12 +75,7 @@ def age_gate_status():
 			"date": day,
 			"limit": limit,
 			"results": results,
-			"counts": {
-				"yes": sum(1 for r in results if r["status"] == "yes"),
-				"unknown": sum(1 for r in results if r["status"] == "unknown"),
-				"no": sum(1 for r in results if r["status"] == "no"),
-				"in_top": sum(1 for r in results if r["in_top"]),
-			},
+			"counts": counts,
 		}
 	)
 
@@ -77,27 +90,61 @@ def age_gate_timeseries():
 	since = request.args.get("since", "2025-07-24")  # Default to July 24
 	limit = int(request.args.get("limit", 100))
 
-	coll = get_collection("domain_rank")
-	all_dates = sorted(coll.distinct("date", {"country": country}))
-	
-	# Filter dates from July 24 onwards
-	filtered_dates = [d for d in all_dates if d >= since]
+	coll = _coll("domain_rank")
 
-	points: List[Dict] = []
-	for d in filtered_dates:
-		top = list(
-			coll.find({"country": country, "date": d}, {"_id": 0, "domain": 1, "rank": 1})
-			.sort("rank", 1)
-			.limit(limit)
-		)
-		if not top:
-			continue
-		gated = 0
-		for doc in top:
-			status = get_status(doc["domain"]).get("status", "unknown")
-			if status == "yes":
-				gated += 1
-		# Return count instead of percentage
-		points.append({"ts": f"{d}T00:00:00Z", "value": gated})
-
-	return jsonify({"ok": True, "country": country, "since": since, "limit": limit, "points": points})
+	# Single aggregation round trip: count the gated top-`limit` domains per
+	# date entirely server-side, so only one small int per day crosses the wire.
+	pipeline = [
+		{"$match": {"country": country, "date": {"$gte": since}}},
+		{
+			"$group": {
+				"_id": "$date",
+				"total": {"$sum": 1},
+				"gated": {
+					"$sum": {
+						"$cond": [
+							{
+								"$and": [
+									{"$lte": ["$rank", limit]},
+									{"$in": [{"$toLower": "$domain"}, YES_LIST]},
+								]
+							},
+							1,
+							0,
+						]
+					}
+				},
+			}
+		},
+		{"$sort": {"_id": 1}},
+	]
+
+	# ?format=soa opts into columnar arrays (smaller payload, no per-point dicts)
+	soa = (request.args.get("format") or "").lower() == "soa"
+	if soa:
+		ts_col: List[str] = []
+		val_col: List[int] = []
+		for doc in coll.aggregate(pipeline):
+			if not doc.get("total"):
+				continue
+			ts_col.append(f"{doc['_id']}T00:00:00Z")
+			val_col.append(int(doc["gated"]))
+		points: object = {"ts": ts_col, "value": val_col}
+	else:
+		points = [
+			# Return count instead of percentage
+			{"ts": f"{doc['_id']}T00:00:00Z", "value": int(doc["gated"])}
+			for doc in coll.aggregate(pipeline)
+			if doc.get("total")
+		]
+
+	return jsonify(
+		{
+			"ok": True,
+			"country": country,
+			"since": since,
+			"limit": limit,
+			"format": "soa" if soa else "aos",
+			"points": points,
+		}
+	)
@@ -1,12 +1,17 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional
 from flask import Blueprint, jsonify, request
 
-from app.db.mongo import get_collection
+from app.db.mongo import SERIES_INDEX, get_collection
 
 bp = Blueprint("api_attacks", __name__)
 
+@lru_cache(maxsize=None)
+def _coll(name: str):
+    return get_collection(name)
+
 def _iso_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -40,10 +45,29 @@ def get_attacks():
         since = since_dt.isoformat()
         until = until_dt.isoformat()
 
-    coll = get_collection("l3_ts")
+    coll = _coll("l3_ts")
     q: Dict = {"country": country, "metric": metric, "ts": {"$gte": since, "$lte": until}}
-    cur = coll.find(q, {"_id": 0, "ts": 1, "value": 1}).sort("ts", 1)
-    points: List[Dict] = list(cur)
+    # Large batches cut getMore round trips for long windows
+    cur = (
+        coll.find(q, {"_id": 0, "ts": 1, "value": 1})
+        .hint(SERIES_INDEX)
+        .sort("ts", 1)
+        .batch_size(1000)
+    )
+
+    # ?format=soa opts into columnar arrays (smaller payload, no per-point dicts)
+    soa = (request.args.get("format") or "").lower() == "soa"
+    if soa:
+        ts_col: List[str] = []
+        val_col: List[float] = []
+        for d in cur:
+            ts_col.append(d["ts"])
+            val_col.append(d["value"])
+        points: object = {"ts": ts_col, "value": val_col}
+        count = len(ts_col)
+    else:
+        points = list(cur)
+        count = len(points)
 
     return jsonify({
         "ok": True,
@@ -52,7 +76,8 @@ def get_attacks():
         "since": since,
         "until": until,
         "interval": interval,
+        "format": "soa" if soa else "aos",
         "points": points,
-        "count": len(points),
+        "count": count,
         "time_utc": _iso_now(),
     })
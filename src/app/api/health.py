@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from flask import Blueprint, jsonify
 
@@ -45,10 +46,10 @@ def debug_counts():
         except Exception:
             return 0
 
-    return jsonify({
-        "domain_rank": count("domain_rank"),
-        "traffic_ts": count("traffic_ts"),
-        "l3_ts": count("l3_ts"),
-        "ooni_tool_ok": count("ooni_tool_ok"),
-        "age_gate": count("age_gate"),
-    })
+    # Overlap the five count round trips; each worker uses its own pooled
+    # connection, so wall time is ~max(RTT) instead of sum(RTT).
+    names = ("domain_rank", "traffic_ts", "l3_ts", "ooni_tool_ok", "age_gate")
+    with ThreadPoolExecutor(max_workers=len(names)) as ex:
+        counts = dict(zip(names, ex.map(count, names)))
+
+    return jsonify(counts)
@@ -26,6 +26,19 @@ def _parse_iso(name: str) -> Optional[str]:
     v = request.args.get(name)
     return v if v else None
 
+def _want_soa() -> bool:
+    # ?format=soa opts into columnar arrays (smaller payload, no per-row dicts)
+    return (request.args.get("format") or "").lower() == "soa"
+
+def _rows_to_soa(cur) -> Dict[str, List]:
+    cols: Dict[str, List] = {"date": [], "ok": [], "tests": [], "ok_rate": []}
+    for d in cur:
+        cols["date"].append(d.get("date"))
+        cols["ok"].append(d.get("ok"))
+        cols["tests"].append(d.get("tests"))
+        cols["ok_rate"].append(d.get("ok_rate"))
+    return cols
+
 @bp.get("/ooni/tor")
 def tor_reachability():
     """
@@ -62,11 +75,13 @@ def tor_reachability():
         }
     
     cur = coll.find(q, {"_id": 0, "date": 1, "ok": 1, "tests": 1, "ok_rate": 1}).sort("date", 1)
-    results = list(cur)
-    
+    soa = _want_soa()
+    results = _rows_to_soa(cur) if soa else list(cur)
+
     return jsonify({
         "ok": True,
         "country": country,
+        "format": "soa" if soa else "aos",
         "results": results,
         "since": since,
         "until": until,
@@ -94,7 +109,8 @@ def reachability():
         until = until_dt.isoformat()
 
     coll = get_collection("ooni_tool_ok")
-    series: Dict[str, List[Dict]] = {}
+    soa = _want_soa()
+    series: Dict[str, object] = {}
 
     for tool in tools:
         q: Dict = {
@@ -103,17 +119,21 @@ def reachability():
             "date": {"$gte": since, "$lte": until},  # date is stored as YYYY-MM-DD string
         }
         cur = coll.find(q, {"_id": 0, "date": 1, "ok": 1, "tests": 1, "ok_rate": 1}).sort("date", 1)
-        series[tool] = list(cur)
+        series[tool] = _rows_to_soa(cur) if soa else list(cur)
 
     # Optional tiny summary: latest ok_rate per tool (if any)
     latest: Dict[str, Optional[float]] = {}
     for tool, rows in series.items():
-        latest[tool] = rows[-1]["ok_rate"] if rows else None
+        if soa:
+            latest[tool] = rows["ok_rate"][-1] if rows["ok_rate"] else None
+        else:
+            latest[tool] = rows[-1]["ok_rate"] if rows else None
 
     return jsonify({
         "ok": True,
         "country": country,
         "tools": tools,
+        "format": "soa" if soa else "aos",
         "since": since,
         "until": until,
         "series": series,
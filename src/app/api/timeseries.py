@@ -5,8 +5,7 @@ from typing import Dict, List, Optional
 
 from flask import Blueprint, jsonify, request
 
-from app.db.mongo import get_collection
-from app.analytics.windows import compute_window_stats
+from app.db.mongo import SERIES_INDEX, get_collection
 
 bp = Blueprint("api_timeseries", __name__)
 
@@ -29,9 +28,21 @@ def _parse_iso(name: str) -> Optional[str]:
     v = request.args.get(name)
     return v if v else None
 
-def _find_series(country: str, metric: str, since_iso: Optional[str], until_iso: Optional[str]) -> List[Dict]:
+def _want_soa() -> bool:
+    # ?format=soa opts into columnar {"ts": [...], "value": [...]} payloads,
+    # which skip per-point dicts and halve the JSON size (keys not repeated).
+    return (request.args.get("format") or "").lower() == "soa"
+
+def _find_series(
+    country: str,
+    metric: str,
+    since_iso: Optional[str],
+    until_iso: Optional[str],
+    soa: bool = False,
+):
     """
-    Return a list of {ts, value} sorted by ts (ISO strings).
+    Return points sorted by ts (ISO strings): a list of {ts, value} dicts by
+    default, or columnar {"ts": [...], "value": [...]} when soa=True.
     Handles both traffic_ts and l3_ts collections based on metric name.
     """
     # Determine which collection to query based on metric
@@ -50,8 +61,23 @@ def _find_series(country: str, metric: str, since_iso: Optional[str], until_iso:
         if until_iso:
             tcrit["$lte"] = until_iso
         q["ts"] = tcrit
-    cur = coll.find(q, {"_id": 0, "ts": 1, "value": 1}).sort("ts", 1)
-    return list(cur)
+    # Large batches cut getMore round trips for long (hourly, multi-month) windows
+    cur = (
+        coll.find(q, {"_id": 0, "ts": 1, "value": 1})
+        .hint(SERIES_INDEX)
+        .sort("ts", 1)
+        .batch_size(1000)
+    )
+    if not soa:
+        return list(cur)
+    ts_col: List[str] = []
+    val_col: List[float] = []
+    ts_append = ts_col.append
+    val_append = val_col.append
+    for d in cur:
+        ts_append(d["ts"])
+        val_append(d["value"])
+    return {"ts": ts_col, "value": val_col}
 
 @bp.get("/timeseries")
 def get_timeseries():
@@ -73,21 +99,23 @@ def get_timeseries():
         since = since_dt.isoformat()
         until = until_dt.isoformat()
 
-    base = _find_series(country, metric, since, until)
+    soa = _want_soa()
+    base = _find_series(country, metric, since, until, soa=soa)
     payload: Dict[str, object] = {
         "ok": True,
         "country": country,
         "metric": metric,
         "since": since,
         "until": until,
+        "format": "soa" if soa else "aos",
         "points": base,
         "time_utc": _iso_now(),
     }
 
     if controls:
-        ctrl_map: Dict[str, List[Dict]] = {}
+        ctrl_map: Dict[str, object] = {}
         for c in controls:
-            ctrl_map[c] = _find_series(c, metric, since, until)
+            ctrl_map[c] = _find_series(c, metric, since, until, soa=soa)
         payload["controls"] = ctrl_map
 
     return jsonify(payload)
@@ -98,6 +126,9 @@ def window_stats():
     GET /api/window-stats?country=GB&metric=http_requests_norm&event=2025-07-25&pre=14&post=14&controls=IE,NL
     Returns mean_pre, mean_post, pct_delta, and z-score vs synthetic control (avg of controls).
     """
+    # Lazy import: keeps numpy out of app startup until stats are requested
+    from app.analytics.windows import compute_window_stats
+
     country = request.args.get("country", "GB").upper()
     metric = request.args.get("metric", "http_requests_norm")
     event = request.args.get("event")  # YYYY-MM-DD required
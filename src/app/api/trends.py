@@ -1,30 +1,69 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import base64
+import hashlib
 import io
 import logging
-from functools import lru_cache
+import os
+import threading
+from time import time as _epoch
 from typing import Optional
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request
 
 bp = Blueprint("api_trends", __name__)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Persistent asyncio loop (daemon thread) that owns a single long-lived
+# Chromium instance; requests only open/close pages on it, so the ~1-2s
+# browser launch cost is paid once per process instead of per screenshot.
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_BROWSER = None  # pyppeteer Browser, only touched from the background loop
 
-def _param(name: str, default: str) -> str:
-    v = request.args.get(name)
-    return v if v else default
+# Bounded pool of pre-warmed pages (viewport + UA already configured).
+# Pages are recycled after a number of uses to dodge Chromium memory creep.
+_POOL_SIZE = int(os.getenv("TRENDS_POOL_SIZE", "4"))
+_PAGE_MAX_USES = 50
+_PAGE_POOL: Optional[asyncio.Queue] = None
+_INIT_LOCK = asyncio.Lock()  # only used from the background loop
 
 
-@lru_cache(maxsize=64)
-def _cache_key(q: str, geo: str, time: str) -> str:  # noqa: ARG001 (used by lru_cache)
-    return f"{q}|{geo}|{time}"
+def _new_loop() -> asyncio.AbstractEventLoop:
+    # uvloop's selector is noticeably faster for the Chromium websocket
+    # traffic pyppeteer generates; fall back to the stdlib loop if missing.
+    try:
+        import uvloop  # type: ignore
 
+        return uvloop.new_event_loop()
+    except ImportError:
+        return asyncio.new_event_loop()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    if _LOOP is not None:
+        return _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = _new_loop()
+            threading.Thread(
+                target=loop.run_forever, name="trends-loop", daemon=True
+            ).start()
+            _LOOP = loop
+    return _LOOP
+
+
+async def _get_browser():
+    """Launch Chromium once and reuse it across requests."""
+    global _BROWSER
+    if _BROWSER is not None:
+        return _BROWSER
 
-async def _screenshot_trends_png_async(q: str, geo: str, time: str) -> bytes:
     # Lazy import to avoid heavy startup cost when not used
     try:
         from pyppeteer import launch  # type: ignore
@@ -32,71 +71,326 @@ async def _screenshot_trends_png_async(q: str, geo: str, time: str) -> bytes:
         logger.error(f"pyppeteer not available: {e}")
         raise RuntimeError("Screenshot service not available - pyppeteer missing")
 
+    async with _INIT_LOCK:
+        if _BROWSER is None:
+            _BROWSER = await launch(
+                headless=True,
+                args=[
+                    "--no-sandbox",
+                    "--disable-dev-shm-usage",
+                    "--disable-gpu",
+                    "--window-size=1280,720",
+                    "--disable-web-security",
+                    "--disable-features=VizDisplayCompositor",
+                ],
+            )
+    return _BROWSER
+
+
+# Resource types and URL fragments that never contribute to the TIMESERIES
+# chart we screenshot; aborting them makes networkidle2 fire seconds sooner.
+_BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+_BLOCKED_URL_PARTS = ("doubleclick", "google-analytics", "googletagmanager")
+
+
+def _on_page_request(req) -> None:
+    blocked = req.resourceType in _BLOCKED_RESOURCE_TYPES or any(
+        part in req.url for part in _BLOCKED_URL_PARTS
+    )
+    asyncio.ensure_future(req.abort() if blocked else req.continue_())
+
+
+async def _new_page(browser):
+    """Create a page with viewport/UA pre-set so requests skip that setup."""
+    page = await browser.newPage()
+    # Interception is wired once per pooled page, not per screenshot.
+    await page.setRequestInterception(True)
+    page.on("request", _on_page_request)
+    # deviceScaleFactor 1 (not 2): @2x quadruples the pixels Chromium has to
+    # render and encode for no benefit in a dashboard <img>.
+    await page.setViewport({"width": 1280, "height": 720, "deviceScaleFactor": 1})
+    # Set user agent to avoid bot detection
+    await page.setUserAgent(
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+    page._trends_uses = 0
+    return page
+
+
+def _browser_alive(browser) -> bool:
+    """Best-effort liveness check for the pooled Chromium instance."""
+    try:
+        if browser.process is not None and browser.process.returncode is not None:
+            return False
+        return not browser._connection._closed
+    except Exception:
+        return False
+
+
+async def _acquire_page():
+    global _BROWSER, _PAGE_POOL
+    # Self-heal after a Chromium crash: drop the dead browser (and the pool of
+    # pages bound to it) so _get_browser relaunches instead of raising forever.
+    if _BROWSER is not None and not _browser_alive(_BROWSER):
+        async with _INIT_LOCK:
+            if _BROWSER is not None and not _browser_alive(_BROWSER):
+                logger.warning("Chromium connection lost; relaunching browser")
+                _BROWSER = None
+                _PAGE_POOL = None
+    browser = await _get_browser()
+    if _PAGE_POOL is None:
+        async with _INIT_LOCK:
+            if _PAGE_POOL is None:
+                pool: asyncio.Queue = asyncio.Queue()
+                for _ in range(_POOL_SIZE):
+                    await pool.put(await _new_page(browser))
+                _PAGE_POOL = pool
+    page = await _PAGE_POOL.get()
+    if page.isClosed() or page._trends_uses >= _PAGE_MAX_USES:
+        try:
+            await page.close()
+        except Exception:
+            pass
+        try:
+            page = await _new_page(browser)
+        except Exception:
+            # Hand the slot token back before propagating: losing it would
+            # shrink the pool until requests block 60s on an empty queue.
+            await _PAGE_POOL.put(page)
+            raise
+    return page
+
+
+async def _release_page(page):
+    pool = _PAGE_POOL
+    if pool is None:
+        return
+    page._trends_uses += 1
+    try:
+        await page.goto("about:blank")
+    except Exception:
+        try:
+            await page.close()
+        except Exception:
+            pass
+        try:
+            page = await _new_page(await _get_browser())
+        except Exception as e:
+            # Browser is probably gone; keep the closed page as the slot
+            # token so the pool stays full — _acquire_page replaces it (or
+            # relaunches Chromium) on the next request.
+            logger.warning(f"Could not replace pooled page: {e}")
+    await pool.put(page)
+
+
+def _close_browser() -> None:
+    if _BROWSER is not None and _LOOP is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(_BROWSER.close(), _LOOP).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing browser at exit: {e}")
+
+
+atexit.register(_close_browser)
+
+
+def _param(name: str, default: str) -> str:
+    v = request.args.get(name)
+    return v if v else default
+
+
+def _cache_key(q: str, geo: str, time: str) -> str:
+    return f"{q}|{geo}|{time}"
+
+
+# TTL-bounded cache of rendered PNG bytes so repeated dashboard loads of the
+# same (q, geo, time) skip Chromium entirely. Trends data is hour-grained, so
+# a 15-minute default TTL makes repeat hits a dict lookup at no freshness cost.
+_PNG_CACHE_TTL = int(os.getenv("TRENDS_CACHE_TTL", "900"))
+try:
+    from cachetools import TTLCache  # type: ignore
+
+    _PNG_CACHE: Optional["TTLCache"] = TTLCache(maxsize=256, ttl=_PNG_CACHE_TTL)
+except ImportError:  # pragma: no cover - cachetools is in requirements
+    _PNG_CACHE = None
+_PNG_CACHE_LOCK = threading.Lock()
+
+
+def _png_cache_get(key: str) -> Optional[bytes]:
+    if _PNG_CACHE is None:
+        return None
+    with _PNG_CACHE_LOCK:
+        return _PNG_CACHE.get(key)
+
+
+def _png_cache_put(key: str, png: bytes) -> None:
+    if _PNG_CACHE is None:
+        return
+    with _PNG_CACHE_LOCK:
+        _PNG_CACHE[key] = png
+
+
+# Optional shared Redis cache so Gunicorn workers share PNG hits and survive
+# reloads. Created lazily on the background loop (one loop -> one conn pool).
+# Fresh copies expire with the TTL; a longer-lived "stale" copy is kept so a
+# Chromium failure (e.g. Google 429) can serve slightly old pixels instead of
+# a 502.
+_REDIS = None
+_STALE_TTL = 86400
+
+
+async def _get_redis():
+    global _REDIS
+    if _REDIS is not None:
+        return _REDIS
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis.asyncio as aioredis  # type: ignore
+    except ImportError:
+        return None
+    _REDIS = aioredis.from_url(url)
+    return _REDIS
+
+
+async def _redis_png_get(key: str, stale: bool = False) -> Optional[bytes]:
+    r = await _get_redis()
+    if r is None:
+        return None
+    kind = "stale" if stale else "fresh"
+    try:
+        return await r.get(f"trends:png:{kind}:{key}")
+    except Exception as e:
+        logger.warning(f"Redis PNG cache read failed: {e}")
+        return None
+
+
+async def _redis_png_put(key: str, png: bytes, ttl: int) -> None:
+    r = await _get_redis()
+    if r is None:
+        return
+    try:
+        await r.setex(f"trends:png:fresh:{key}", ttl, png)
+        await r.setex(f"trends:png:stale:{key}", _STALE_TTL, png)
+    except Exception as e:
+        logger.warning(f"Redis PNG cache write failed: {e}")
+
+
+def _optimize_png(png: bytes) -> bytes:
+    """Re-encode a PNG at max compression; returns the input if PIL is absent
+    or the result is not smaller."""
+    try:
+        from PIL import Image  # type: ignore
+    except ImportError:
+        return png
+    try:
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(png)).save(buf, "PNG", optimize=True, compress_level=9)
+        opt = buf.getvalue()
+        return opt if len(opt) < len(png) else png
+    except Exception as e:
+        logger.warning(f"PNG recompress failed: {e}")
+        return png
+
+
+async def _recompress_and_replace(key: str, png: bytes, ttl: int) -> None:
+    # Cached PNGs get served many times; spend CPU once, off the request
+    # path, to shrink every future hit. Runs on the background loop.
+    opt = await asyncio.to_thread(_optimize_png, png)
+    if len(opt) < len(png):
+        logger.info(f"Recompressed cached PNG {key}: {len(png)} -> {len(opt)} bytes")
+        _png_cache_put(key, opt)
+        await _redis_png_put(key, opt, ttl)
+
+
+def _bucket_etag(q: str, geo: str, time: str, ttl: int) -> str:
+    """Time-bucketed ETag: stable for a TTL window without hashing any pixels,
+    so polling clients can be answered 304 before cache or Chromium I/O."""
+    bucket = int(_epoch()) // max(ttl, 1)
+    return hashlib.blake2b(
+        f"{q}|{geo}|{time}|{bucket}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def _png_response(png: bytes, etag: Optional[str] = None, ttl: int = _PNG_CACHE_TTL):
+    """PNG response with a strong ETag so browsers can revalidate for free."""
+    if etag is None:
+        etag = hashlib.blake2b(png, digest_size=16).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        # Plain Response instead of send_file(BytesIO): the WSGI layer hands
+        # the bytes to the socket in one piece rather than 8 KiB file chunks.
+        resp = Response(png, mimetype="image/png")
+        resp.headers["Content-Length"] = str(len(png))
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = (
+        f"public, max-age={ttl}, stale-while-revalidate=3600"
+    )
+    return resp
+
+
+async def _screenshot_trends_png_async(q: str, geo: str, time: str) -> bytes:
     url = (
         "https://trends.google.com/trends/explore?"
         f"date={time}&geo={geo}&q={q}&hl=en"
     )
-    
+
     logger.info(f"Taking screenshot of Google Trends: {url}")
-    
-    browser = None
+
+    page = await _acquire_page()
     try:
-        browser = await launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--window-size=1280,720",
-                "--disable-web-security",
-                "--disable-features=VizDisplayCompositor",
-            ],
-        )
-        
-        page = await browser.newPage()
-        await page.setViewport({"width": 1280, "height": 720, "deviceScaleFactor": 2})
-        
-        # Set user agent to avoid bot detection
-        await page.setUserAgent(
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        
-        # Navigate to the page
+        # Navigate to the page (viewport/UA were set when the page was pooled)
         await page.goto(url, {"waitUntil": "networkidle2", "timeout": 30000})
         
-        # Wait for content to load
-        await asyncio.sleep(5)
-        
-        # Try to wait for specific elements that indicate the page is ready
+        # Event-driven readiness: fire as soon as the chart SVG has painted
+        # instead of paying a flat 5s sleep on every screenshot.
+        bbox = None
         try:
-            await page.waitForSelector('div[data-chart-type="TIMESERIES"]', timeout=10000)
+            await page.waitForFunction(
+                "() => { const e = document.querySelector("
+                "'div[data-chart-type=\"TIMESERIES\"]');"
+                " return e && e.querySelectorAll('path').length > 0; }",
+                {"timeout": 10000, "polling": 200},
+            )
+            bbox = await page.evaluate(
+                "(s) => { const e = document.querySelector(s);"
+                " if (!e) return null;"
+                " const r = e.getBoundingClientRect();"
+                " return {x: r.x, y: r.y, width: r.width, height: r.height}; }",
+                'div[data-chart-type="TIMESERIES"]',
+            )
         except Exception:
             logger.warning("TIMESERIES chart element not found, proceeding anyway")
-        
-        # Take screenshot
-        png = await page.screenshot(fullPage=True)
+            # Short settle so we capture whatever did render (error pages etc.)
+            await asyncio.sleep(0.5)
+
+        # Screenshot via CDP directly: clip to the chart (far fewer pixels
+        # than fullPage) and ask Chromium for its fast PNG encode path.
+        opts = {"format": "png", "optimizeForSpeed": True}
+        if bbox and bbox.get("width") and bbox.get("height"):
+            opts["clip"] = {**bbox, "scale": 1}
+        result = await page._client.send("Page.captureScreenshot", opts)
+        png = base64.b64decode(result["data"])
         logger.info(f"Successfully captured screenshot for {q} in {geo}")
-        return png  # type: ignore[return-value]
+        return png
         
     except Exception as e:
         logger.error(f"Error taking screenshot: {e}")
         raise RuntimeError(f"Screenshot failed: {str(e)}")
     finally:
-        if browser:
-            try:
-                await browser.close()
-            except Exception as e:
-                logger.warning(f"Error closing browser: {e}")
+        await _release_page(page)
 
 
-def _run(coro):
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
+async def _run_async(coro, timeout: float = 60.0):
+    # Submit onto the persistent background loop (which owns the browser) and
+    # await the wrapped future. Note Flask runs async views via AsyncToSync
+    # inside the WSGI worker thread, so the worker still blocks until the
+    # coroutine finishes — this buys loop/browser reuse, not extra concurrency.
+    fut = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    return await asyncio.wait_for(asyncio.wrap_future(fut), timeout=timeout)
 
 
 @bp.get("/trends/health")
@@ -134,13 +428,15 @@ def trends_health():
 
 
 @bp.get("/trends/png")
-def trends_png():
+async def trends_png():
     """
     GET /api/trends/png?q=vpn&geo=GB&time=today%2012-m
 
     Best-effort PNG screenshot of Google Trends explore page to avoid client-side
     embed quota issues (429). This uses a headless browser. It may still be
-    rate-limited by Google depending on IP.
+    rate-limited by Google depending on IP. Async view so the Chromium work
+    runs as one coroutine on the shared background loop; Flask still executes
+    it synchronously inside the WSGI worker (asgiref AsyncToSync).
     """
     q = _param("q", "vpn")
     geo = _param("geo", "GB")
@@ -148,13 +444,55 @@ def trends_png():
 
     logger.info(f"Trends PNG request: q={q}, geo={geo}, time={time}")
 
+    # Per-query TTL override (clamped) for callers that want fresher pixels.
     try:
-        png_bytes: bytes = _run(_screenshot_trends_png_async(q, geo, time))
-        return send_file(io.BytesIO(png_bytes), mimetype="image/png")
+        ttl = min(int(request.args.get("ttl", _PNG_CACHE_TTL)), _STALE_TTL)
+    except ValueError:
+        ttl = _PNG_CACHE_TTL
+
+    # Conditional-request fast path: polling clients that revalidate within
+    # the TTL window get a 304 without touching the caches or Chromium.
+    etag = _bucket_etag(q, geo, time, ttl)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = (
+            f"public, max-age={ttl}, stale-while-revalidate=3600"
+        )
+        return resp
+
+    key = _cache_key(q, geo, time)
+    cached = _png_cache_get(key)
+    if cached is not None:
+        return _png_response(cached, etag=etag, ttl=ttl)
+
+    # Shared cache next (survives reloads, shared across workers). Redis ops
+    # run on the background loop, which owns the connection pool.
+    shared = await _run_async(_redis_png_get(key), timeout=5.0)
+    if shared is not None:
+        _png_cache_put(key, shared)
+        return _png_response(shared, etag=etag, ttl=ttl)
+
+    try:
+        png_bytes: bytes = await _run_async(_screenshot_trends_png_async(q, geo, time))
+        _png_cache_put(key, png_bytes)
+        await _run_async(_redis_png_put(key, png_bytes, ttl), timeout=5.0)
+        # Fire-and-forget: shrink the cached copy after this response is out.
+        asyncio.run_coroutine_threadsafe(
+            _recompress_and_replace(key, png_bytes, ttl), _get_loop()
+        )
+        return _png_response(png_bytes, etag=etag, ttl=ttl)
     except Exception as e:
         logger.error(f"Trends PNG generation failed: {e}")
+        # Stale-on-error: a slightly old chart beats a 502 when Google
+        # rate-limits us.
+        stale = await _run_async(_redis_png_get(key, stale=True), timeout=5.0)
+        if stale is not None:
+            resp = _png_response(stale, etag=etag, ttl=ttl)
+            resp.headers["X-Cache"] = "stale"
+            return resp
         return jsonify({
-            "ok": False, 
+            "ok": False,
             "error": str(e),
             "message": "Unable to generate screenshot. Try the direct link instead."
         }), 502
@@ -17,6 +17,8 @@ except Exception:
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 FLASK_ENV = os.getenv("FLASK_ENV", "production")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
+# Pre-split form that Flask-CORS actually wants, parsed once at import.
+CORS_ORIGINS_LIST = tuple(o.strip() for o in CORS_ORIGINS.split(",") if o.strip())
 
 # --- Encryption ---
 FERNET_KEY = os.getenv("FERNET_KEY")  # optional: used by crypto.encrypt
@@ -31,7 +33,7 @@ MONGODB_URI = os.getenv("MONGODB_URI")
 MONGO_DB = os.getenv("MONGO_DB", "internet_tracker")
 
 # --- Defaults for analysis ---
-DEFAULT_COUNTRY = os.getenv("COUNTRIES", "GB")
+DEFAULT_COUNTRY = os.getenv("COUNTRIES", "GB").split(",", 1)[0].strip().upper()
 DEFAULT_EVENT_DATE = os.getenv("EVENT_DATE", "2025-07-25")
 
 # --- Event registry (country + event_date + optional Tor PNG) ---
@@ -46,15 +48,9 @@ EVENTS = [
 
 DEFAULT_EVENT_SLUG = "uk-age-verify-2025"
 
+# Slug index built once at import; get_event is O(1) instead of a list scan.
+_EVENTS_BY_SLUG = {e["slug"]: e for e in EVENTS}
+
 def get_event(slug: str | None):
-    if not slug:
-        slug = DEFAULT_EVENT_SLUG
-    for e in EVENTS:
-        if e["slug"] == slug:
-            return e
     # fallback to first if unknown slug
-    return EVENTS[0]
-
-# (existing) defaults still used by APIs/ingesters
-DEFAULT_COUNTRY = os.getenv("COUNTRIES", "GB").split(",")[0].upper()
-DEFAULT_EVENT_DATE = os.getenv("EVENT_DATE", "2025-07-25")
+    return _EVENTS_BY_SLUG.get(slug or DEFAULT_EVENT_SLUG, EVENTS[0])
@@ -3,7 +3,7 @@ from __future__ import annotations
 import base64
 import hmac
 import os
-from hashlib import sha256
+from functools import lru_cache
 from typing import Optional
 
 from cryptography.fernet import Fernet, InvalidToken
@@ -23,7 +23,11 @@ def generate_fernet_key() -> str:
     return Fernet.generate_key().decode("ascii")
 
 
+@lru_cache(maxsize=1)
 def _get_fernet() -> Fernet:
+    # Memoized: constructing a Fernet parses the base64 key and allocates the
+    # AES/HMAC primitives; no need to redo that per call. Tests that rotate
+    # FERNET_KEY can call _get_fernet.cache_clear().
     key = config.FERNET_KEY or os.getenv("FERNET_KEY")
     if not key:
         raise RuntimeError(
@@ -63,7 +67,10 @@ def decrypt_str(token: str) -> str:
 # HMAC helpers (optional)
 # ---------------------------
 
+@lru_cache(maxsize=1)
 def _get_hmac_key() -> bytes:
+    # Memoized for the same reason as _get_fernet: skip the per-call base64
+    # decode attempt. Cleared via _get_hmac_key.cache_clear() on key rotation.
     key = config.HMAC_KEY or os.getenv("HMAC_KEY")
     if not key:
         raise RuntimeError(
@@ -81,9 +88,10 @@ def hmac_sign(data: str) -> str:
     """
     Return hex-encoded HMAC-SHA256 signature for the given data.
     """
+    # hmac.digest is the one-shot C fast path: no Python HMAC object, straight
+    # into OpenSSL's HMAC-SHA256.
     key = _get_hmac_key()
-    mac = hmac.new(key, data.encode("utf-8"), sha256).hexdigest()
-    return mac
+    return hmac.digest(key, data.encode("utf-8"), "sha256").hex()
 
 
 def hmac_verify(data: str, signature_hex: str) -> bool:
@@ -91,8 +99,9 @@ def hmac_verify(data: str, signature_hex: str) -> bool:
     Constant-time verify of hex-encoded HMAC-SHA256 signature.
     """
     try:
-        expected = hmac_sign(data)
-        # constant-time compare
-        return hmac.compare_digest(expected, signature_hex)
+        key = _get_hmac_key()
+        expected = hmac.digest(key, data.encode("utf-8"), "sha256")
+        # constant-time compare on raw bytes
+        return hmac.compare_digest(expected, bytes.fromhex(signature_hex))
     except Exception:
         return False
@@ -40,16 +40,27 @@ CURATED: dict[str, dict[str, str | None]] = {
 }
 
 
+# Stable iteration order for API responses, sorted once at import time.
+SORTED_DOMAINS = tuple(sorted(CURATED.keys()))
+
+# Flat lowercase sets for hot-path membership checks (O(1) lookup, no call).
+YES_SET = frozenset(d.lower() for d, v in CURATED.items() if v.get("status") == "yes")
+NO_SET = frozenset(d.lower() for d, v in CURATED.items() if v.get("status") == "no")
+
+
+# Shared miss default: one dict for every unknown domain instead of a fresh
+# allocation per lookup. Treat as read-only.
+_DEFAULT: dict[str, str | None] = {"status": "unknown", "note": None}
+
+
 def get_status(domain: str) -> dict[str, str | None]:
     """
     Lookup helper. Returns a dict {status, note}.
     Defaults to {"status": "unknown", "note": None} if not found.
     """
     d = domain.lower()
-    # Exact match first
-    if d in CURATED:
-        return CURATED[d]
-    # Fallback: strip common 'www.' prefix
-    if d.startswith("www.") and d[4:] in CURATED:
-        return CURATED[d[4:]]
-    return {"status": "unknown", "note": None}
+    # CURATED keys carry no 'www.' prefix, so strip it up front and resolve
+    # with a single dict get.
+    if d.startswith("www."):
+        d = d[4:]
+    return CURATED.get(d, _DEFAULT)
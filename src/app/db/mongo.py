@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import os
 import logging
+import threading
 from typing import Optional
 
-from pymongo import MongoClient
+from pymongo import IndexModel, MongoClient
 try:
     # Optional, matches Atlas “Stable API v1” example (safe to omit if unavailable)
     from pymongo.server_api import ServerApi  # type: ignore
@@ -16,6 +17,19 @@ except Exception:  # older pymongo
 from app import config
 
 _CLIENT: Optional[MongoClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+# Canonical compound-index keys, shared with query sites that pass .hint()
+# so the planner never falls back to a collection scan or in-memory sort.
+DOMAIN_RANK_INDEX = [("country", 1), ("date", 1), ("rank", 1)]
+SERIES_INDEX = [("country", 1), ("metric", 1), ("ts", 1)]
+OONI_INDEX = [("country", 1), ("tool", 1), ("date", 1)]
+
+# Single definition of the ooni index, shared by ensure_indexes() and the CLI
+# ingest path: unique so concurrent upserts can't race duplicate rows. Two
+# builds with the same keys but different names/options would conflict, so
+# every caller must go through this model.
+OONI_INDEX_MODEL = IndexModel(OONI_INDEX, unique=True, name="cc_tool_date")
 
 
 def _mongo_uri() -> str:
@@ -32,14 +46,27 @@ def _db_name() -> str:
 
 
 def get_client() -> MongoClient:
+    # Double-checked locking: without the lock two concurrent first requests
+    # could each build (and leak) a MongoClient with its own TLS handshake.
     global _CLIENT
     if _CLIENT is not None:
         return _CLIENT
-    uri = _mongo_uri()
-    kwargs = {"serverSelectionTimeoutMS": 5000}
-    if _SERVER_API is not None:
-        kwargs["server_api"] = _SERVER_API  # type: ignore
-    _CLIENT = MongoClient(uri, **kwargs)
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            uri = _mongo_uri()
+            kwargs = {
+                "serverSelectionTimeoutMS": 5000,
+                # Keep a few connections warm and bound the pool; compress the
+                # wire protocol when zstd/snappy are available (pymongo drops
+                # unavailable compressors with a warning).
+                "maxPoolSize": 50,
+                "minPoolSize": 5,
+                "compressors": "zstd,snappy",
+                "retryWrites": True,
+            }
+            if _SERVER_API is not None:
+                kwargs["server_api"] = _SERVER_API  # type: ignore
+            _CLIENT = MongoClient(uri, **kwargs)
     return _CLIENT
 
 
@@ -71,14 +98,18 @@ def ensure_indexes(logger: Optional[logging.Logger] = None) -> None:
         return
 
     idx = {
-        "domain_rank": [("country", 1), ("date", 1), ("rank", 1)],
-        "traffic_ts": [("country", 1), ("metric", 1), ("ts", 1)],
-        "l3_ts": [("country", 1), ("metric", 1), ("ts", 1)],
-        "bot_traffic": [("country", 1), ("metric", 1), ("ts", 1)],
-        "ooni_tool_ok": [("country", 1), ("tool", 1), ("date", 1)],
+        "domain_rank": IndexModel(DOMAIN_RANK_INDEX),
+        "traffic_ts": IndexModel(SERIES_INDEX),
+        "l3_ts": IndexModel(SERIES_INDEX),
+        "bot_traffic": IndexModel(SERIES_INDEX),
+        "ooni_tool_ok": OONI_INDEX_MODEL,
     }
-    for coll, keys in idx.items():
+    for coll, model in idx.items():
         try:
-            db[coll].create_index(keys)
+            # Check the key signature first: on warm starts every index
+            # already exists and we skip the create round trip entirely.
+            existing = {tuple(ix["key"].items()) for ix in db[coll].list_indexes()}
+            if tuple(model.document["key"].items()) not in existing:
+                db[coll].create_indexes([model])
         except Exception as e:
             (logger or logging).warning("index create failed for %s: %s", coll, e)
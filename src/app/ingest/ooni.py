@@ -1,17 +1,179 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from datetime import date, timedelta
 from typing import Dict, List, Tuple
 
 import requests
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from app.db.mongo import get_collection
+from app.db.mongo import OONI_INDEX_MODEL, get_collection
 
 BASE = "https://api.ooni.io/api/v1/aggregation"  # singular endpoint
 
+# Pooled session for the blocking path: keep-alive skips the TLS handshake on
+# calls 2..N and transient 429/5xx get retried with backoff. gzip keeps the
+# JSON small on the wire.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)
+        ),
+    ),
+)
+SESSION.headers.update({"Accept-Encoding": "gzip"})
+
 # OONI test names we care about
 TOOLS = ["tor", "snowflake", "psiphon"]
 
+# Optional: httpx lets the three per-tool aggregation calls run concurrently
+# (one RTT of wall time instead of three); requests remains the fallback.
+try:
+    import httpx  # type: ignore
+except ImportError:
+    httpx = None  # type: ignore
+
+# HTTP/2 needs the h2 package (the httpx[http2] extra); with it, all three
+# tool fetches multiplex over one TLS connection instead of opening one each.
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Lazily built shared httpx.Client for the blocking path; reused across calls
+# so the connection (and its HTTP/2 session) survives between tools.
+_HTTPX_CLIENT = None
+
+
+def _get_httpx_client():
+    global _HTTPX_CLIENT
+    if httpx is None:
+        return None
+    if _HTTPX_CLIENT is None:
+        _HTTPX_CLIENT = httpx.Client(
+            http2=_HTTP2, timeout=30.0, headers={"Accept-Encoding": "gzip"}
+        )
+    return _HTTPX_CLIENT
+
+
+class _IterReader:
+    """Minimal file-like over an httpx byte iterator, so ijson can stream
+    a response body that httpx only exposes as chunks."""
+
+    def __init__(self, it):
+        self._it = it
+        self._buf = b""
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            chunks = [self._buf]
+            self._buf = b""
+            chunks.extend(self._it)
+            return b"".join(chunks)
+        while len(self._buf) < n:
+            try:
+                self._buf += next(self._it)
+            except StopIteration:
+                break
+        out, self._buf = self._buf[:n], self._buf[n:]
+        return out
+
+
+class _AsyncIterReader:
+    """Async flavour of _IterReader, over httpx's aiter_bytes()."""
+
+    def __init__(self, it):
+        self._it = it
+        self._buf = b""
+
+    async def read(self, n=-1):
+        if n is None or n < 0:
+            chunks = [self._buf]
+            self._buf = b""
+            async for chunk in self._it:
+                chunks.append(chunk)
+            return b"".join(chunks)
+        while len(self._buf) < n:
+            try:
+                self._buf += await self._it.__anext__()
+            except StopAsyncIteration:
+                break
+        out, self._buf = self._buf[:n], self._buf[n:]
+        return out
+
+# Optional: ijson streams rows off the wire without ever materializing the
+# whole payload dict, capping peak memory on big aggregation windows.
+try:
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None  # type: ignore
+
+# Decode aggregation payloads (hundreds of KB for long windows) with orjson's
+# Rust parser when present; r.json() is the stdlib fallback. Works for both
+# requests and httpx responses since each exposes .content.
+try:
+    import orjson  # type: ignore
+
+    def _loads_response(r) -> dict:
+        return orjson.loads(r.content)
+except ImportError:  # pragma: no cover - orjson is in requirements
+    def _loads_response(r) -> dict:
+        return r.json()
+
+# Max UpdateOne ops per bulk_write call (stays well under the 16MB command cap)
+_BULK_CHUNK = 1000
+
+# The CLI ingest path doesn't go through create_app/ensure_indexes, so make
+# sure the upsert filter (country, tool, date) is index-backed before the
+# first bulk write; without it every upsert lookup collection-scans.
+_INDEX_READY = False
+
+
+def _ensure_indexes(col) -> None:
+    global _INDEX_READY
+    if _INDEX_READY:
+        return
+    try:
+        # Same shared model the web app builds in ensure_indexes(); the key
+        # check skips the round trip (and any options conflict with a legacy
+        # same-key index) when one already exists.
+        existing = {tuple(ix["key"].items()) for ix in col.list_indexes()}
+        if tuple(OONI_INDEX_MODEL.document["key"].items()) not in existing:
+            col.create_indexes([OONI_INDEX_MODEL])
+        _INDEX_READY = True
+    except Exception as e:
+        # e.g. legacy duplicates blocking the unique build; upserts still work
+        logging.warning("[OONI] index ensure failed: %s", e)
+
+
+def _flush_ops(col, ops: List[UpdateOne]) -> int:
+    """Send buffered upserts in one unordered bulk round trip per chunk."""
+    written = 0
+    for i in range(0, len(ops), _BULK_CHUNK):
+        chunk = ops[i : i + _BULK_CHUNK]
+        try:
+            res = col.bulk_write(chunk, ordered=False)
+            written += (res.upserted_count or 0) + (res.modified_count or 0)
+        except BulkWriteError as e:
+            details = e.details
+            written += int(details.get("nUpserted", 0)) + int(details.get("nModified", 0))
+    return written
+
+# Candidate row-list keys in preference order ('data'/'items' are the
+# tolerant fallbacks for oddly nested responses).
+_ROW_KEYS = ("result", "results", "data", "items")
+
+
 def _pick_rows(payload: dict) -> List[dict]:
     """
     OONI sometimes returns `result`, sometimes `results`.
@@ -19,75 +181,218 @@ def _pick_rows(payload: dict) -> List[dict]:
     """
     if not isinstance(payload, dict):
         return []
-    if isinstance(payload.get("result"), list):
-        return payload["result"]
-    if isinstance(payload.get("results"), list):
-        return payload["results"]
-    # Some responses nest under 'data' or similar; be tolerant
-    for k in ("data", "items"):
-        if isinstance(payload.get(k), list):
-            return payload[k]
+    g = payload.get
+    for k in _ROW_KEYS:
+        v = g(k)
+        if isinstance(v, list):
+            return v
     return []
 
 
+async def _fetch_tool_async(client, tool: str, params: Dict, debug: bool = False) -> List[dict]:
+    """Fetch one tool's aggregation rows; empty list on failure."""
+    if debug:
+        print("[OONI] GET", BASE, params)
+    try:
+        # Streaming primary path: rows are parsed straight off the wire so
+        # the full payload is never buffered, same as the sync fallback.
+        if ijson is not None:
+            async with client.stream("GET", BASE, params=params) as r:
+                if debug:
+                    print("[OONI] status", r.status_code)
+                r.raise_for_status()
+                saw_result, rows = await _stream_rows_async(
+                    _AsyncIterReader(r.aiter_bytes())
+                )
+            if saw_result:
+                return rows
+        # Buffered fallback: ijson missing, or rows under a different root key.
+        r = await client.get(BASE, params=params)
+        if debug:
+            print("[OONI] status", r.status_code)
+        r.raise_for_status()
+        return _pick_rows(_loads_response(r))
+    except Exception as e:
+        if debug:
+            print(f"[OONI] fetch failed for {tool}: {e}")
+        return []
+
+
+async def _gather_tools(params_by_tool: Dict[str, Dict], debug: bool = False) -> Dict[str, List[dict]]:
+    async with httpx.AsyncClient(http2=_HTTP2, timeout=30) as client:
+        results = await asyncio.gather(
+            *(
+                _fetch_tool_async(client, tool, params, debug=debug)
+                for tool, params in params_by_tool.items()
+            )
+        )
+    return dict(zip(params_by_tool, results))
+
+
+class _RowCollector:
+    """Accumulates 'result' rows from an ijson event stream.
+
+    Tracks whether the 'result' key was actually seen so callers can tell a
+    legitimately empty result array (no refetch needed) apart from rows
+    living under a different root key (fall back to the buffered fetch).
+    """
+
+    def __init__(self):
+        self.saw_result = False
+        self.rows: List[dict] = []
+        self._builder = None
+
+    def feed(self, prefix: str, event: str, value) -> None:
+        if prefix == "result" and event == "start_array":
+            self.saw_result = True
+        elif prefix.startswith("result.item"):
+            if self._builder is None:
+                self._builder = ijson.ObjectBuilder()
+            self._builder.event(event, value)
+            if prefix == "result.item" and event == "end_map":
+                self.rows.append(self._builder.value)
+                self._builder = None
+
+
+def _stream_rows(f) -> Tuple[bool, List[dict]]:
+    """Stream 'result' rows off a blocking file-like body."""
+    c = _RowCollector()
+    for prefix, event, value in ijson.parse(f):
+        c.feed(prefix, event, value)
+    return c.saw_result, c.rows
+
+
+async def _stream_rows_async(f) -> Tuple[bool, List[dict]]:
+    """Stream 'result' rows off an async-readable body."""
+    c = _RowCollector()
+    async for prefix, event, value in ijson.parse_async(f):
+        c.feed(prefix, event, value)
+    return c.saw_result, c.rows
+
+
+def _fetch_tool_sync(tool: str, params: Dict, debug: bool = False) -> List[dict]:
+    """Blocking fallback used when httpx is not installed."""
+    if debug:
+        print("[OONI] GET", BASE, params)
+    # Streaming fast path: walk 'result' rows straight off the socket so the
+    # full payload dict is never held in memory. If the rows live under a
+    # different root key (rare) or anything goes wrong, re-fetch buffered.
+    if ijson is not None:
+        try:
+            client = _get_httpx_client()
+            if client is not None:
+                # Shared HTTP/2 client: same multiplexed connection as the
+                # other tools, streamed into ijson through _IterReader.
+                with client.stream("GET", BASE, params=params) as r:
+                    if debug:
+                        print("[OONI] status", r.status_code)
+                    r.raise_for_status()
+                    saw_result, rows = _stream_rows(_IterReader(r.iter_bytes()))
+            else:
+                with SESSION.get(BASE, params=params, timeout=30, stream=True) as r:
+                    if debug:
+                        print("[OONI] status", r.status_code)
+                    r.raise_for_status()
+                    r.raw.decode_content = True
+                    saw_result, rows = _stream_rows(r.raw)
+            if saw_result:
+                # An empty result array is a real answer (quiet window), not a
+                # parse miss — don't refetch the whole payload for it.
+                return rows
+        except Exception as e:
+            if debug:
+                print(f"[OONI] stream parse failed for {tool}: {e}")
+    try:
+        client = _get_httpx_client()
+        if client is not None:
+            r = client.get(BASE, params=params)
+        else:
+            r = SESSION.get(BASE, params=params, timeout=30)
+        if debug:
+            print("[OONI] status", r.status_code)
+        r.raise_for_status()
+        return _pick_rows(_loads_response(r))
+    except Exception as e:
+        if debug:
+            print(f"[OONI] fetch failed for {tool}: {e}")
+        return []
+
+
+def _fetch_all_tools(params_by_tool: Dict[str, Dict], debug: bool = False) -> Dict[str, List[dict]]:
+    """Rows per tool, concurrently when httpx is available."""
+    if httpx is not None:
+        try:
+            return asyncio.run(_gather_tools(params_by_tool, debug=debug))
+        except Exception as e:
+            if debug:
+                print(f"[OONI] async fetch failed, falling back to serial: {e}")
+    return {
+        tool: _fetch_tool_sync(tool, params, debug=debug)
+        for tool, params in params_by_tool.items()
+    }
+
+
+def _extract_row(row: dict) -> Tuple[str | None, int, int]:
+    """Pull (day, tests, ok) out of one aggregation row in a single pass."""
+    day = (
+        row.get("bucket_date")
+        or row.get("measurement_start_day")
+        or (row.get("measurement_start_time") or "")[:10]
+        or None
+    )
+    tests = int(row.get("measurement_count", row.get("total", 0)) or 0)
+    ok = int(row.get("ok_count", row.get("confirmed_count", 0)) or 0)
+    return day, tests, ok
+
+
 def fetch_ooni(country: str = "GB", days: int = 120, debug: bool = False) -> int:
     """
     Fetch daily ok_rate per tool for a country and upsert into `ooni_tool_ok`.
     ok_rate = ok_count / measurement_count (if measurement_count > 0)
     """
     col = get_collection("ooni_tool_ok")
+    _ensure_indexes(col)
+    cc = country.upper()
     end = date.today()
     start = end - timedelta(days=days)
 
-    total_upserts = 0
+    # Constant fields built once; only test_name varies per tool.
+    base_params = {
+        "probe_cc": cc,
+        "since": start.isoformat(),
+        "until": end.isoformat(),
+        "axis_x": "measurement_start_day",
+        "format": "JSON",
+    }
+    params_by_tool = {tool: base_params | {"test_name": tool} for tool in TOOLS}
+    rows_by_tool = _fetch_all_tools(params_by_tool, debug=debug)
 
-    for tool in TOOLS:
-        params = {
-            "probe_cc": country.upper(),
-            "test_name": tool,
-            "since": start.isoformat(),
-            "until": end.isoformat(),
-            "axis_x": "measurement_start_day",
-            "format": "JSON",
-        }
-        if debug:
-            print("[OONI] GET", BASE, params)
-        r = requests.get(BASE, params=params, timeout=30)
-        if debug:
-            print("[OONI] status", r.status_code)
-        try:
-            r.raise_for_status()
-            payload = r.json()
-        except Exception as e:
-            if debug:
-                print(f"[OONI] fetch failed for {tool}: {e}")
-            continue
+    total_upserts = 0
 
-        rows = _pick_rows(payload)
-        upserts_for_tool = 0
+    for tool, rows in rows_by_tool.items():
+        ops: List[UpdateOne] = []
 
         for row in rows:
-            day = (
-                row.get("bucket_date")
-                or row.get("measurement_start_day")
-                or (row.get("measurement_start_time", "")[:10] if row.get("measurement_start_time") else None)
-            )
-            tests_count = int(row.get("measurement_count", row.get("total", 0)) or 0)
-            ok = int(row.get("ok_count", row.get("confirmed_count", 0)) or 0)
-            ok_rate = (ok / tests_count) if tests_count else None
+            day, tests_count, ok = _extract_row(row)
             if not day:
                 continue
             doc = {
                 "date": day,
-                "country": country.upper(),
+                "country": cc,
                 "tool": tool,
                 "ok": ok,
                 "tests": tests_count,
-                "ok_rate": ok_rate,
+                "ok_rate": (ok / tests_count) if tests_count else None,
             }
-            col.update_one({"date": day, "country": country.upper(), "tool": tool}, {"$set": doc}, upsert=True)
-            upserts_for_tool += 1
+            ops.append(
+                UpdateOne(
+                    {"date": day, "country": cc, "tool": tool},
+                    {"$set": doc},
+                    upsert=True,
+                )
+            )
 
+        upserts_for_tool = _flush_ops(col, ops) if ops else 0
         total_upserts += upserts_for_tool
         if debug:
             print(f"[OONI] tool={tool} days={len(rows)} upserts={upserts_for_tool}")
@@ -1,11 +1,31 @@
+import io
+
+import numpy as np
+
+
 def sparkline_points(values, width=320, height=60, pad=4):
     if not values: return ""
-    minv = min(values); maxv = max(values); rng = (maxv - minv) or 1.0
-    n = len(values); step = (width - 2*pad) / max(1, n-1)
-    pts = []
-    for i, v in enumerate(values):
-        x = pad + i*step
-        y = height - pad - ((v - minv) / rng) * (height - 2*pad)
-        pts.append(f"{x:.1f},{y:.1f}")
-    return " ".join(pts)
-
+    # Whole-array math in NumPy: one C pass instead of a Python loop with
+    # per-point float ops, which dominates render time for long series.
+    arr = np.asarray(values, dtype=np.float64)
+    minv = arr.min(); maxv = arr.max()
+    if maxv == minv:
+        # Constant series (dead metric): a flat polyline only needs its two
+        # endpoints, drawn at mid-height.
+        mid = height / 2
+        return f"{pad:.1f},{mid:.1f} {width-pad:.1f},{mid:.1f}"
+    # Hoist the scale out of the per-point math: one division, then a
+    # multiply per element.
+    inv = (height - 2*pad) / (maxv - minv)
+    n = arr.size; step = (width - 2*pad) / max(1, n-1)
+    xs = pad + np.arange(n) * step
+    ys = height - pad - (arr - minv) * inv
+    # Emit straight into one growing buffer instead of building n small
+    # "x,y" strings for join to copy again.
+    buf = io.StringIO()
+    w = buf.write
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        if i:
+            w(" ")
+        w(f"{x:.1f},{y:.1f}")
+    return buf.getvalue()
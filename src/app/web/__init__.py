@@ -35,5 +35,28 @@ def domains_page():
 def trends_page():
     return render_template("pages/trends_page.html")
 
+_PAGE_TEMPLATES = (
+    "index.html",
+    "pages/dashboard.html",
+    "pages/http_page.html",
+    "pages/l3_page.html",
+    "pages/ooni_page.html",
+    "pages/bot_page.html",
+    "pages/domains_page.html",
+    "pages/trends_page.html",
+)
+
 def register_web(app):
     app.register_blueprint(bp)
+
+    # Pre-warm the Jinja cache: compile every page template (and its includes)
+    # at startup so no user request pays the first-hit compile cost. Skip the
+    # per-render stat() when not in debug.
+    if not app.debug:
+        app.jinja_env.auto_reload = False
+    try:
+        with app.app_context():
+            for name in _PAGE_TEMPLATES:
+                app.jinja_env.get_template(name)
+    except Exception as e:
+        app.logger.warning(f"[register_web] template pre-warm skipped: {e}")
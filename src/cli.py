@@ -3,9 +3,7 @@ from __future__ import annotations
 
 import os
 import sys
-import json
 import argparse
-import traceback
 
 # Ensure our package is importable regardless of CWD
 sys.path.insert(0, os.path.dirname(__file__))
@@ -126,11 +124,25 @@ def cmd_fetch_ooni(country: str, days: int, debug: bool):
     print(f"Upserted {n} ooni_ts rows")
 
 
+def _dumps_pretty(obj) -> str:
+    # orjson's Rust pretty-printer beats the stdlib by a wide margin; fall
+    # back to json.dumps when unavailable. Output is 2-space indented either
+    # way.
+    try:
+        import orjson
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    except ImportError:
+        import json
+        return json.dumps(obj, indent=2)
+
+
 def cmd_events():
     # Pretty-print the event registry to verify wiring
+    import json
+
     from app import config
     try:
-        print(json.dumps({"ok": True, "events": getattr(config, "EVENTS", [])}, indent=2))
+        print(_dumps_pretty({"ok": True, "events": getattr(config, "EVENTS", [])}))
     except Exception as e:
         print(json.dumps({"ok": False, "error": str(e)}))
         raise
@@ -169,24 +181,22 @@ def cmd_secret(action: str, value: str | None, hmac_flag: bool):
 # Parser / main
 # ---------------------------
 
-def main():
-    p = argparse.ArgumentParser(description="Web Change Tracker CLI")
-    sub = p.add_subparsers(dest="cmd", required=True)
-
-    # serve
+def _add_serve(sub):
     sp = sub.add_parser("serve", help="Run Flask server")
     sp.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
     sp.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
     sp.add_argument("--debug", action="store_true")
     sp.set_defaults(func=lambda a: cmd_serve(a.port, a.host, a.debug))
 
-    # db
+
+def _add_db(sub):
     sc = sub.add_parser("db", help="Database utilities")
     sc_sub = sc.add_subparsers(dest="dbcmd", required=True)
     scp = sc_sub.add_parser("ping", help="Ping MongoDB")
     scp.set_defaults(func=lambda a: cmd_db_ping())
 
-    # cloudflare
+
+def _add_fetch_cloudflare(sub):
     cf = sub.add_parser("fetch-cloudflare", help="Cloudflare ingest (top|http|l3|bots)")
     cf.add_argument("--kind", required=True, choices=["top", "http", "l3", "bots"])
     cf.add_argument("--country", default="GB")
@@ -201,7 +211,8 @@ def main():
         a.kind, a.country, a.interval, a.days, a.limit, a.date, a.direction, a.debug
     ))
 
-    # cloudflare range
+
+def _add_fetch_cloudflare_range(sub):
     cfr = sub.add_parser("fetch-cloudflare-range", help="Cloudflare ingest (top|http|l3|bots) over a date range")
     cfr.add_argument("--kind", required=True, choices=["top", "http", "l3", "bots"])
     cfr.add_argument("--country", default="GB")
@@ -215,18 +226,21 @@ def main():
         a.kind, a.country, a.since_date, a.until_date, a.limit, a.direction, a.debug
     ))
 
-    # ooni
+
+def _add_fetch_ooni(sub):
     so = sub.add_parser("fetch-ooni", help="OONI reachability (tor/snowflake/psiphon) daily ok_rate")
     so.add_argument("--country", default="GB")
     so.add_argument("--days", type=int, default=120)
     so.add_argument("--debug", action="store_true")
     so.set_defaults(func=lambda a: cmd_fetch_ooni(a.country, a.days, a.debug))
 
-    # events
+
+def _add_events(sub):
     ev = sub.add_parser("events", help="Print configured events registry")
     ev.set_defaults(func=lambda a: cmd_events())
 
-    # secret
+
+def _add_secret(sub):
     ss = sub.add_parser("secret", help="Fernet/HMAC helpers")
     ss_sub = ss.add_subparsers(dest="action", required=True)
     gk = ss_sub.add_parser("gen-key"); gk.add_argument("--hmac", action="store_true")
@@ -234,11 +248,38 @@ def main():
     dec = ss_sub.add_parser("decrypt"); dec.add_argument("value")
     ss.set_defaults(func=lambda a: cmd_secret(a.action, getattr(a, "value", None), getattr(a, "hmac", False)))
 
+
+# One builder per subcommand so main() can construct only the parser the
+# invocation needs; --help and unknown commands build them all.
+_BUILDERS = {
+    "serve": _add_serve,
+    "db": _add_db,
+    "fetch-cloudflare": _add_fetch_cloudflare,
+    "fetch-cloudflare-range": _add_fetch_cloudflare_range,
+    "fetch-ooni": _add_fetch_ooni,
+    "events": _add_events,
+    "secret": _add_secret,
+}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Web Change Tracker CLI")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else None
+    if cmd in _BUILDERS:
+        _BUILDERS[cmd](sub)
+    else:
+        for build in _BUILDERS.values():
+            build(sub)
+
     args = p.parse_args()
     try:
         return args.func(args)
     except Exception as e:
-        # Surface trace on CLI errors
+        # Surface trace on CLI errors (imported here; the happy path never
+        # needs it)
+        import traceback
         print("ERROR:", e)
         traceback.print_exc()
         raise SystemExit(1)
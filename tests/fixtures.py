@@ -29,10 +29,18 @@ def mock_db():
 
 @pytest.fixture(autouse=True)
 def _patch_db(monkeypatch, mock_db):
+    # Track which collections the test actually touches so teardown only
+    # clears those instead of sweeping every collection after every test.
+    touched = set()
+
+    def _get_collection(name):
+        touched.add(name)
+        return mock_db[name]
+
     monkeypatch.setattr(mongo_mod, "get_db", lambda: mock_db, raising=True)
-    monkeypatch.setattr(mongo_mod, "get_collection", lambda name: mock_db[name], raising=True)
+    monkeypatch.setattr(mongo_mod, "get_collection", _get_collection, raising=True)
     yield
-    for name in list(mock_db.list_collection_names()):
+    for name in touched:
         mock_db[name].delete_many({})
 
 
@@ -45,11 +53,18 @@ def _patch_cfg(monkeypatch):
     yield
 
 
-@pytest.fixture
-def app_client():
+@pytest.fixture(scope="session")
+def _app():
+    # One app for the whole session: create_app pays Jinja/Blueprint/Mongo
+    # setup once instead of per test. Per-test isolation comes from the cheap
+    # test_client below plus the autouse _patch_db reset.
     os.environ["FLASK_ENV"] = "testing"
-    app = create_app()
-    with app.test_client() as c:
+    return create_app()
+
+
+@pytest.fixture
+def app_client(_app):
+    with _app.test_client() as c:
         yield c
 
 
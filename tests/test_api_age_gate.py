@@ -0,0 +1,28 @@
+import mongomock
+import pytest
+
+import app.api.age_gate as age_gate_mod
+
+
+@pytest.fixture
+def domain_rank(monkeypatch):
+    coll = mongomock.MongoClient()["internet_tracker_test"]["domain_rank"]
+    monkeypatch.setattr(age_gate_mod, "_coll", lambda name: coll, raising=True)
+    return coll
+
+
+def test_timeseries_counts_www_prefixed_domains(app_client, domain_rank):
+    # 'WWW.reddit.com' must count as gated just like get_status() would say:
+    # the pipeline's curated match has to mirror its www-stripping fallback.
+    domain_rank.insert_many(
+        [
+            {"country": "GB", "date": "2025-08-01", "domain": "WWW.reddit.com", "rank": 1},
+            {"country": "GB", "date": "2025-08-01", "domain": "x.com", "rank": 2},
+            {"country": "GB", "date": "2025-08-01", "domain": "bbc.co.uk", "rank": 3},
+        ]
+    )
+    r = app_client.get("/api/age-gate/timeseries?country=GB&since=2025-08-01")
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data["ok"] is True
+    assert data["points"] == [{"ts": "2025-08-01T00:00:00Z", "value": 2}]